@@ -1,9 +1,10 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from database.db import db
 from routes.auth import auth_bp
 from routes.cases import case_bp
 from routes.documents import doc_bp
 from routes.ai import ai_bp
+from services.static_assets import send_index, send_asset
 from flask_cors import CORS
 
 app = Flask(__name__)
@@ -26,7 +27,11 @@ for bp, prefix in [
 
 @app.route("/")
 def index():
-    return send_from_directory("static", "wakili_wetu.html")
+    return send_index()
+
+@app.route("/assets/<path:name>")
+def assets(name):
+    return send_asset(name)
 
 if __name__ == "__main__":
     # Create database tables 
@@ -0,0 +1,116 @@
+"""Build the frontend into cacheable, precompressed assets.
+
+Splits ``static/wakili_wetu.html`` into a small HTML shell plus
+content-hashed ``app.<hash>.css`` / ``app.<hash>.js`` files under
+``static/dist/``, writes gzip (and brotli, when the ``brotli`` package is
+installed) variants next to each file, and records everything in
+``static/dist/manifest.json`` for ``services.static_assets`` to serve.
+
+The previous build's hashed assets are kept (and still served) so clients
+holding the old shell don't get 404s; anything older is pruned.
+
+Run from the backend folder:
+
+    python3 build_static.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip alone is still a big win
+    brotli = None
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+SOURCE_HTML = os.path.join(basedir, "static", "wakili_wetu.html")
+DIST_DIR = os.path.join(basedir, "static", "dist")
+
+# only the inline blocks without attributes are extracted
+STYLE_RE = re.compile(r"<style>(.*?)</style>", re.S)
+SCRIPT_RE = re.compile(r"<script>(.*?)</script>", re.S)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def write_file(path: str, data: bytes):
+    """Replace ``path`` atomically so a running server never reads a partial file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_asset(name: str, data: bytes, manifest: dict):
+    """Write ``data`` plus its compressed variants and record it."""
+    path = os.path.join(DIST_DIR, name)
+    write_file(path, data)
+
+    encodings = []
+    if brotli is not None:
+        write_file(path + ".br", brotli.compress(data, quality=11))
+        encodings.append("br")
+    # mtime=0 keeps the output byte-for-byte reproducible
+    write_file(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append("gzip")
+
+    manifest["files"][name] = {"hash": content_hash(data), "encodings": encodings}
+
+
+def build():
+    with open(SOURCE_HTML, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest_path = os.path.join(DIST_DIR, "manifest.json")
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        previous = {n: i for n, i in old["files"].items() if n != old["index"]}
+
+    manifest = {"index": "index.html", "files": {}, "previous": {}}
+
+    style = STYLE_RE.search(html)
+    if style:
+        css = style.group(1).encode("utf-8")
+        css_name = f"app.{content_hash(css)}.css"
+        write_asset(css_name, css, manifest)
+        tag = f'<link rel="stylesheet" href="/assets/{css_name}" />'
+        html = html[:style.start()] + tag + html[style.end():]
+
+    script = SCRIPT_RE.search(html)
+    if script:
+        js = script.group(1).encode("utf-8")
+        js_name = f"app.{content_hash(js)}.js"
+        write_asset(js_name, js, manifest)
+        # keep the tag where the inline script was so execution order is unchanged
+        tag = f'<script src="/assets/{js_name}"></script>'
+        html = html[:script.start()] + tag + html[script.end():]
+
+    write_asset("index.html", html.encode("utf-8"), manifest)
+
+    # the last build's assets stay available for shells loaded before this one
+    manifest["previous"] = {n: i for n, i in previous.items() if n not in manifest["files"]}
+    write_file(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    # prune only after the new manifest is in place
+    keep = {"manifest.json"}
+    for name in list(manifest["files"]) + list(manifest["previous"]):
+        keep.update({name, name + ".br", name + ".gz"})
+    for name in os.listdir(DIST_DIR):
+        if name not in keep and not name.endswith(".tmp"):
+            os.remove(os.path.join(DIST_DIR, name))
+
+    return manifest
+
+
+if __name__ == "__main__":
+    manifest = build()
+    for name, info in manifest["files"].items():
+        size = os.path.getsize(os.path.join(DIST_DIR, name))
+        print(f"{name}: {size} bytes ({', '.join(info['encodings'])})")
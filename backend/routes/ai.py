@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from services.ai_engine import summarize_document
+from services.ai_engine import summarize_document, registry
 from services.legal_fetcher import ingest_text
 from werkzeug.utils import secure_filename
 import os
@@ -26,6 +26,12 @@ def analyze():
         return jsonify({"text": str(summary), "cites": []})
 
 
+@ai_bp.route("/providers", methods=["GET"])
+def provider_stats():
+    """Report health and latency percentiles for each AI provider."""
+    return jsonify(registry.stats())
+
+
 @ai_bp.route("/upload", methods=["POST"])
 def upload_file():
     """Accept a file upload, read content and summarize it."""
@@ -1,24 +1,38 @@
 import requests
 import os
+import re
 from typing import Dict
 
 
 from services.local_legal_engine import engine, generate_legal_answer
+from services.provider_registry import ProviderRegistry, ProviderError
 
-# determine which AI provider to use: 'gemini', 'openai', or 'local'
+# preferred AI provider: 'gemini', 'openai', 'http', or 'local'
 AI_PROVIDER = os.environ.get("AI_PROVIDER", "gemini").lower()
 
-# read credentials -- only one needs to be present depending on provider
+# ordered failover chain; defaults to the preferred provider backed by the
+# offline engine, e.g. AI_PROVIDERS="gemini,openai,http,local"
+AI_PROVIDERS = list(dict.fromkeys(
+    p.strip().lower()
+    for p in os.environ.get("AI_PROVIDERS", f"{AI_PROVIDER},local").split(",")
+    if p.strip()
+))
+
+# read credentials -- only providers with credentials are registered
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
-# note: the "local" provider now uses our offline legal engine; no external
-# URL or key is required.  (We used to support an HTTP endpoint, which is
-# commented out above.)
+# the "local" provider uses our offline legal engine; no external URL or key
+# is required.  The "http" provider is a stand-in for a self-hosted model
+# server that accepts {context, question} and returns {text, cites}.
+LOCAL_AI_URL = os.environ.get("LOCAL_AI_URL")
+
 if AI_PROVIDER == "gemini" and not GEMINI_API_KEY:
     raise RuntimeError("GEMINI_API_KEY environment variable not set for Gemini provider.")
 if AI_PROVIDER == "openai" and not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY environment variable not set for OpenAI provider.")
+if AI_PROVIDER == "http" and not LOCAL_AI_URL:
+    raise RuntimeError("LOCAL_AI_URL environment variable not set for http provider.")
 
 # cache the selected model name so we only fetch once
 _cached_model_name = None
@@ -66,11 +80,31 @@ def get_model_name():
 
 
 
-def analyze_with_gemini(context: str, question: str) -> dict:
+def _local_summarize(t: str) -> str:
+    """Crude first-two-sentences summary used when every provider fails."""
+    if not t:
+        return ''
+    s = re.split(r"(?<=[.?!])\s+", t.strip())
+    if len(s) >= 2:
+        return (s[0] + ' ' + s[1]).strip()
+    return (t.strip()[:400] + ('...' if len(t.strip()) > 400 else '')).strip()
+
+
+def _fallback(context: str, question: str) -> dict:
+    combined = (context + ' ' + question).strip()
+    fallback = _local_summarize(combined)
+    # if fallback is basically the same as the question/context,
+    # return a generic note so the chat doesn't seem broken
+    if fallback.strip() == combined.strip():
+        fallback = "The AI service is currently unavailable; please try again later."
+    return {"text": f"[fallback] {fallback}", "cites": []}
+
+
+def call_gemini(context: str, question: str) -> dict:
     """
     Sends legal context to Gemini for analysis.
 
-    Returns a dict with keys 'text' and 'cites'.
+    Returns a dict with keys 'text' and 'cites'; raises ProviderError on failure.
     """
 
     prompt = f"""
@@ -114,71 +148,35 @@ Provide a helpful legal explanation based strictly on the text.
             },
             timeout=30
         )
+    except requests.exceptions.RequestException as e:
+        raise ProviderError(f"Gemini request failed: {e}") from e
+
+    if response.status_code != 200:
+        raise ProviderError(f"Gemini returned HTTP {response.status_code}")
+
+    data = response.json()
+
+    # ✅ Extract model text safely
+    candidates = data.get("candidates", [])
+    if not candidates:
+        raise ProviderError("Gemini returned no candidates")
 
-        # ✅ Surface API errors instead of silently failing, but provide a fallback
-        if response.status_code != 200:
-            # simple local summarizer based on context+question
-            def _local_summarize(t):
-                import re
-                if not t: return ''
-                s = re.split(r"(?<=[.?!])\s+", t.strip())
-                if len(s) >= 2:
-                    return (s[0] + ' ' + s[1]).strip()
-                return (t.strip()[:400] + ('...' if len(t.strip())>400 else '')).strip()
-            combined = (context + ' ' + question).strip()
-            fallback = _local_summarize(combined)
-            # if fallback is basically the same as the question/context,
-            # return a generic note so the chat doesn't seem broken
-            if fallback.strip() == combined.strip():
-                fallback = "The AI service is currently unavailable; please try again later."
-            return {"text": f" {fallback}", "cites": []}
-
-        data = response.json()
-
-        # ✅ Extract model text safely
-        candidates = data.get("candidates", [])
-        if not candidates:
-            return {"text": "[AI returned no candidates]", "cites": []}
-
-        parts = candidates[0].get("content", {}).get("parts", [])
-        if not parts:
-            return {"text": "[AI returned empty content]", "cites": []}
-
-        text = parts[0].get("text", "").strip()
-
-        if not text:
-            return {"text": "[AI returned empty text]", "cites": []}
-
-        return {"text": text, "cites": []}
-
-    except requests.exceptions.Timeout:
-        return {"text": "[AI request timed out]", "cites": []}
-
-    except Exception as e:
-        # network or parsing exception; provide fallback summary
-        def _local_summarize(t):
-            import re
-            if not t: return ''
-            s = re.split(r"(?<=[.?!])\s+", t.strip())
-            if len(s) >= 2:
-                return (s[0] + ' ' + s[1]).strip()
-            return (t.strip()[:400] + ('...' if len(t.strip())>400 else '')).strip()
-        combined = (context + ' ' + question).strip()
-        fallback = _local_summarize(combined)
-        if fallback.strip() == combined.strip():
-            fallback = "The AI service is currently unavailable; please try again later."
-        return {"text": f"[fallback] {fallback}", "cites": []}
-
-# --- additional provider implementations ---
-
-
-def analyze_with_local(context: str, question: str) -> dict:
+    parts = candidates[0].get("content", {}).get("parts", [])
+    text = parts[0].get("text", "").strip() if parts else ""
+    if not text:
+        raise ProviderError("Gemini returned empty text")
+
+    return {"text": text, "cites": []}
+
+
+def call_local(context: str, question: str) -> dict:
     """
     Fully offline legal analysis engine.
     """
 
     search_query = f"{question} {context[:500]}"
-    results = engine.search(search_query)
+    # cited and citing provisions come along so the answer and cites cover them
+    results = engine.search(search_query, expand=True)
 
     answer, cites = generate_legal_answer(results, question)
 
@@ -187,7 +185,8 @@ def analyze_with_local(context: str, question: str) -> dict:
         "cites": cites
     }
 
-def analyze_with_openai(context: str, question: str) -> dict:
+
+def call_openai(context: str, question: str) -> dict:
     """Call OpenAI Responses API for analysis."""
     prompt = (
         "You are a Kenyan legal research assistant.\n\n"
@@ -204,46 +203,69 @@ def analyze_with_openai(context: str, question: str) -> dict:
     }
     try:
         r = requests.post(url, headers=headers, json=body, timeout=30)
-        if r.status_code != 200:
-            # fallback summary
-            def _loc(t):
-                import re
-                if not t: return ''
-                s = re.split(r"(?<=[.?!])\s+", t.strip())
-                return (s[0] + ' ' + s[1]).strip() if len(s)>=2 else t[:400]
-            f = _loc(context + ' ' + question)
-            return {"text": f"[fallback] {f}", "cites": []}
+    except requests.exceptions.RequestException as e:
+        raise ProviderError(f"OpenAI request failed: {e}") from e
+    if r.status_code != 200:
+        raise ProviderError(f"OpenAI returned HTTP {r.status_code}")
+    data = r.json()
+    out = ""
+    if "output" in data and isinstance(data["output"], list):
+        for item in data["output"]:
+            if isinstance(item, dict):
+                out += item.get("content", "")
+            elif isinstance(item, str):
+                out += item
+    if not out and "choices" in data:
+        for ch in data["choices"]:
+            out += ch.get("message", {}).get("content", "")
+    out = out.strip()
+    if not out:
+        raise ProviderError("OpenAI returned empty output")
+    return {"text": out, "cites": []}
+
+
+def call_http(context: str, question: str) -> dict:
+    """Call a self-hosted model server at LOCAL_AI_URL."""
+    try:
+        r = requests.post(LOCAL_AI_URL, json={"context": context, "question": question}, timeout=30)
+    except requests.exceptions.RequestException as e:
+        raise ProviderError(f"Local model server request failed: {e}") from e
+    if r.status_code != 200:
+        raise ProviderError(f"Local model server returned HTTP {r.status_code}")
+    try:
         data = r.json()
-        out = ""
-        if "output" in data and isinstance(data["output"], list):
-            for item in data["output"]:
-                if isinstance(item, dict):
-                    out += item.get("content", "")
-                elif isinstance(item, str):
-                    out += item
-        if not out and "choices" in data:
-            for ch in data["choices"]:
-                out += ch.get("message", {}).get("content", "")
-        out = out.strip()
-        if not out:
-            return {"text": "[OpenAI returned empty output]", "cites": []}
-        return {"text": out, "cites": []}
-    except Exception as e:
-        return {"text": f"[OpenAI error: {e}]", "cites": []}
+    except ValueError as e:
+        raise ProviderError("Local model server returned invalid JSON") from e
+    if not isinstance(data, dict):
+        raise ProviderError("Local model server returned a non-object response")
+    text = data.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ProviderError("Local model server returned empty text")
+    # callers join cites into a string, so anything but a list of strings is rejected
+    cites = data.get("cites", [])
+    if not isinstance(cites, list) or not all(isinstance(c, str) for c in cites):
+        raise ProviderError("Local model server returned malformed cites")
+    return {"text": text.strip(), "cites": cites}
+
+
+registry = ProviderRegistry()
+if GEMINI_API_KEY:
+    registry.register("gemini", call_gemini)
+if OPENAI_API_KEY:
+    registry.register("openai", call_openai)
+if LOCAL_AI_URL:
+    registry.register("http", call_http)
+registry.register("local", call_local, fallback_only=True)
 
 
 def analyze(context: str, question: str) -> Dict[str, any]:
-    """Dispatch based on AI_PROVIDER"""
-    if AI_PROVIDER == "openai":
-        return analyze_with_openai(context, question)
-    elif AI_PROVIDER == "local":
-        return analyze_with_local(context, question)
-    else:  # default to gemini
-        return analyze_with_gemini(context, question)
+    """Run the AI_PROVIDERS chain with failover and hedging."""
+    result = registry.call(AI_PROVIDERS, context, question)
+    if result is None:
+        return _fallback(context, question)
+    return result
 
 
 def summarize_document(text: str) -> dict:
     """Compatibility wrapper used by routes."""
     return analyze(text, "Provide a short, clear summary.")
-
-
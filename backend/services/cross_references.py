@@ -0,0 +1,169 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# a provision is identified by (act, kind, number), e.g.
+# ("employment_act", "section", "41") or ("constitution", "article", "65")
+Provision = Tuple[str, str, str]
+
+CONSTITUTION = "constitution"
+
+# "Article 27 – Equality ..." / "Section 41 – Notification ..." at the start of a paragraph
+HEADING_RE = re.compile(r"^(Article|Section)\s+(\d+[A-Z]?)\s*[–—-]")
+
+# "Employment Act", "Employment and Labour Relations Act", "Land Act, 2012"
+_ACT_NAME = (
+    r"[A-Z][\w']*(?:\s+(?:(?:and|of|the|for|on|in|to|&)\s+)*[A-Z][\w']*)*"
+    r"\s+Act(?:,?\s+\d{4})?"
+)
+_NUMBER = r"\d+[A-Z]?(?:\(\w+\))*"
+
+# "Article 65", "Article 41(2)", "Articles 27 and 28", "section 41 of the
+# Employment Act", "Section 3 of this Act" / "of the Act" / "Article 3 of this
+# Treaty" (the same instrument), "Section 10 Of The Employment Act"
+REFERENCE_RE = re.compile(
+    r"\b([Aa]rticles?|[Ss]ections?)\s+"
+    rf"({_NUMBER}(?:\s*(?:,|and|or|to)\s*{_NUMBER})*)"
+    r"(?:\s+(?i:of)\s+(?:(?i:the)\s+)?"
+    r"((?i:this\s+(?:Act|Treaty|Code|Convention|Charter|Constitution))|(?i:Constitution)|"
+    rf"{_ACT_NAME}|Act\b))?"
+)
+
+# an "of ..." clause naming some other instrument REFERENCE_RE could not read:
+# "of the Penal Code", "of Cap. 63", "of the Land Control Rules", "of the
+# employment act". Parts, chapters and schedules are the citing act's own.
+_UNPARSED_TARGET_RE = re.compile(
+    r"\s+(?i:of)\s+(?:(?i:the)\s+)?"
+    r"(?:(?i:cap)\b|(?!(?:Part|Chapter|Schedule)\b)[A-Z]|[^.;:()]{0,80}?\b(?i:act)\b)"
+)
+
+# "Sections 1 to 5000000" is a typo or OCR noise, not 5 million references
+MAX_RANGE = 300
+
+
+def act_key(filename: str) -> str:
+    """Name an act after its corpus file: employment_act.txt -> employment_act."""
+    return os.path.splitext(os.path.basename(filename))[0].lower()
+
+
+def _act_from_name(name: str) -> str:
+    """Map "Employment Act" to the key of the file that would hold it."""
+    name = re.sub(r",?\s+\d{4}$", "", name.strip())
+    return re.sub(r"\W+", "_", name).strip("_").lower()
+
+
+def _numbers(listing: str) -> List[str]:
+    """Expand "27 and 28" / "27, 28 or 30" / "27 to 29" into provision numbers.
+
+    Ranges wider than MAX_RANGE only contribute their two endpoints.
+    """
+    listing = re.sub(r"\(\w+\)", "", listing)
+    numbers = []
+    for part in re.split(r"\s*(?:,|\band\b|\bor\b)\s*", listing):
+        bounds = re.split(r"\s*\bto\b\s*", part)
+        if (len(bounds) == 2 and all(b.isdigit() for b in bounds)
+                and 0 <= int(bounds[1]) - int(bounds[0]) <= MAX_RANGE):
+            numbers.extend(str(n) for n in range(int(bounds[0]), int(bounds[1]) + 1))
+        else:
+            numbers.extend(b for b in bounds if b)
+    return numbers
+
+
+def heading_provision(paragraph: str, act: str) -> Optional[Provision]:
+    """Return the provision a heading paragraph introduces, if it is one."""
+    m = HEADING_RE.match(paragraph)
+    if not m:
+        return None
+    return (act, m.group(1).lower(), m.group(2))
+
+
+def extract_references(text: str, act: str) -> List[Provision]:
+    """Find every provision ``text`` cites.
+
+    Bare section and article numbers mean the citing instrument itself;
+    CrossReferenceGraph sends bare articles on to the Constitution when the
+    citing file has no articles of its own.
+    """
+    refs = []
+    for m in REFERENCE_RE.finditer(text):
+        kind = "article" if m.group(1).lower().startswith("article") else "section"
+        target = (m.group(3) or "").lower()
+        if not target and _UNPARSED_TARGET_RE.match(text, m.end()):
+            # names some instrument we can't identify; guessing would invent an edge
+            continue
+        if target.endswith("constitution"):
+            ref_act = CONSTITUTION
+        elif target and target != "act" and not target.startswith("this "):
+            ref_act = _act_from_name(m.group(3))
+        else:
+            ref_act = act
+        refs.extend((ref_act, kind, n) for n in _numbers(m.group(2)))
+    return refs
+
+
+def build_adjacency(edges: Iterable[Tuple[int, int]], n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack (src, dst) edges into CSR arrays: row i's targets are indices[indptr[i]:indptr[i+1]]."""
+    pairs = np.array(sorted(set(edges)), dtype=np.int32).reshape(-1, 2)
+    counts = np.bincount(pairs[:, 0], minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, pairs[:, 1].copy()
+
+
+class CrossReferenceGraph:
+    """Provision-level "cites" and "cited by" adjacency over the corpus.
+
+    Every chunk is anchored to the first chunk of its provision (or to itself
+    when it has none), and edges run between anchors, so a long provision
+    contributes one neighbour rather than one per chunk.
+    """
+
+    def __init__(self, provisions: List[Optional[Provision]], references: List[List[Provision]]):
+        first: Dict[Provision, int] = {}
+        for i, p in enumerate(provisions):
+            if p is not None:
+                first.setdefault(p, i)
+        n = len(provisions)
+        self.anchor = np.array(
+            [first[p] if p is not None else i for i, p in enumerate(provisions)], dtype=np.int32
+        )
+
+        # a bare "Article N" in an act numbered by sections means the Constitution
+        article_acts = {p[0] for p in first if p[1] == "article"}
+
+        def resolve(ref: Provision) -> Provision:
+            if ref[1] == "article" and ref[0] not in article_acts:
+                return (CONSTITUTION, "article", ref[2])
+            return ref
+
+        # references to provisions that are not in the corpus are dropped
+        edges = {
+            (int(self.anchor[i]), first[target])
+            for i, refs in enumerate(references)
+            for target in map(resolve, refs)
+            if target in first and first[target] != self.anchor[i]
+        }
+        self.cites = build_adjacency(edges, n)
+        self.cited_by = build_adjacency(((j, i) for i, j in edges), n)
+
+    @staticmethod
+    def _neighbours(adjacency, i: int) -> np.ndarray:
+        indptr, indices = adjacency
+        return indices[indptr[i]:indptr[i + 1]]
+
+    def related(self, rows: Iterable[int], limit: int) -> List[int]:
+        """Up to ``limit`` rows cited by, then citing, ``rows``; O(degree) per row."""
+        rows = list(rows)
+        seen = set(rows) | {int(self.anchor[i]) for i in rows}
+        out = []
+        for adjacency in (self.cites, self.cited_by):
+            for i in rows:
+                for j in self._neighbours(adjacency, int(self.anchor[i])).tolist():
+                    if j not in seen:
+                        if len(out) == limit:
+                            return out
+                        seen.add(j)
+                        out.append(j)
+        return out
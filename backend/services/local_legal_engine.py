@@ -1,49 +1,147 @@
 import re
 import os
-from typing import List, Tuple
+import atexit
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from services import sharded_index
+from services.cross_references import (
+    CrossReferenceGraph, Provision, act_key, extract_references, heading_provision,
+)
 
 LEGAL_DOCS_PATH = os.environ.get("LEGAL_DOCS_PATH", "legal_docs")
+# where shard files are written for the worker processes to memory-map
+LEGAL_INDEX_PATH = os.environ.get("LEGAL_INDEX_PATH", "legal_index")
+# number of processes scoring shards in parallel; 1 scores them in-process.
+# The index is cut into this many balanced shards, so a query is one task per worker.
+SEARCH_WORKERS = int(os.environ.get("LEGAL_SEARCH_WORKERS", "1"))
 
 class LocalLegalEngine:
     def __init__(self):
         self.documents = []
         self.sources = []
+        # (act, kind, number) of the provision each chunk belongs to, or None
+        self.provisions = []
+        self.xrefs = None
         self.vectorizer = TfidfVectorizer(stop_words="english")
         self.doc_vectors = None
+        # (row offset, row count) of each shard within doc_vectors
+        self.shards = []
+        self._pool = None
+        self._pool_pid = None
         self._load_documents()
+        self._start_pool()
 
     def _load_documents(self):
         """Load legal texts from folder."""
-        for file in os.listdir(LEGAL_DOCS_PATH):
+        act_sizes = []
+        # sorted so shard boundaries are stable between runs
+        for file in sorted(os.listdir(LEGAL_DOCS_PATH)):
             if file.endswith(".txt"):
                 path = os.path.join(LEGAL_DOCS_PATH, file)
                 with open(path, "r", encoding="utf-8") as f:
                     text = f.read()
-                    chunks = self._chunk_text(text)
-                    for chunk in chunks:
+                    chunks = self._chunk_text(text, act_key(file))
+                    act_sizes.append(len(chunks))
+                    for provision, chunk in chunks:
                         self.documents.append(chunk)
                         self.sources.append(file)
+                        self.provisions.append(provision)
 
-        if self.documents:
-            self.doc_vectors = self.vectorizer.fit_transform(self.documents)
-
-    def _chunk_text(self, text: str) -> List[str]:
-        """Split legal text into usable paragraphs."""
-        parts = re.split(r"\n\s*\n", text)
-        return [p.strip() for p in parts if len(p.strip()) > 120]
+        self.xrefs = CrossReferenceGraph(
+            self.provisions,
+            [extract_references(d, act_key(s)) for d, s in zip(self.documents, self.sources)],
+        )
 
-    def search(self, query: str, k: int = 3) -> List[Tuple[str, str]]:
-        """Return top-k relevant legal passages."""
+        if self.documents:
+            # fit over the whole corpus so scores from different shards are comparable
+            self.doc_vectors = self.vectorizer.fit_transform(self.documents).tocsr()
+            self.shards = sharded_index.plan_shards(act_sizes, max(1, SEARCH_WORKERS))
+
+    def _chunk_text(self, text: str, act: str) -> List[Tuple[Optional[Provision], str]]:
+        """Split legal text into usable paragraphs, tagged with their provision.
+
+        Headings are usually short paragraphs of their own, so the provision
+        carries over to the paragraphs that follow until the next heading.
+        """
+        chunks = []
+        provision = None
+        for p in re.split(r"\n\s*\n", text):
+            p = p.strip()
+            provision = heading_provision(p, act) or provision
+            if len(p) > 120:
+                chunks.append((provision, p))
+        return chunks
+
+    def search(self, query: str, k: int = 3, expand: bool = False) -> List[Tuple[str, str]]:
+        """Return top-k relevant legal passages.
+
+        With ``expand``, up to k more passages from the provisions those
+        passages cite or are cited by are appended, straight from the
+        cross-reference graph.
+        """
         if not self.documents:
             return []
 
         query_vec = self.vectorizer.transform([query])
-        scores = cosine_similarity(query_vec, self.doc_vectors)[0]
-        top_idx = scores.argsort()[-k:][::-1]
-
-        return [(self.documents[i], self.sources[i]) for i in top_idx]
+        candidates = None
+        pool = self._get_pool()
+        if pool:
+            try:
+                futures = [
+                    pool.submit(sharded_index.score_in_worker, shard_id, query_vec, k)
+                    for shard_id in range(len(self.shards))
+                ]
+                candidates = [hit for f in futures for hit in f.result()]
+            except BrokenProcessPool:
+                # a worker died (OOM kill, segfault). Re-forking from a threaded
+                # server isn't safe, so drop the pool and search in-process.
+                self._pool = None
+                pool.shutdown(wait=False)
+        if candidates is None:
+            # single process: one pass over the whole matrix is cheaper than slicing
+            candidates = sharded_index.top_k(self.doc_vectors, query_vec, 0, k)
+
+        # merge the per-shard top-k lists
+        rows = [i for _, i in heapq.nlargest(k, candidates)]
+        if expand:
+            rows += self.xrefs.related(rows, limit=k)
+        return [(self.documents[i], self.sources[i]) for i in rows]
+
+    def _get_pool(self):
+        # a pool inherited through fork (e.g. gunicorn --preload) belongs to the parent
+        if self._pool is None or self._pool_pid != os.getpid():
+            return None
+        return self._pool
+
+    def _start_pool(self):
+        """Start the shard workers while the process is still single-threaded.
+
+        Workers are forked rather than spawned: a spawned worker re-imports
+        the app's __main__, which would rebuild this engine in every worker.
+        Forking before any request thread exists avoids that and is safe.
+        Without fork (Windows) search stays in-process.
+        """
+        if SEARCH_WORKERS <= 1 or len(self.shards) <= 1:
+            return
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return
+        paths = sharded_index.save_shards(LEGAL_INDEX_PATH, self.doc_vectors, self.shards)
+        specs = [(path, offset) for path, (offset, _) in zip(paths, self.shards)]
+        self._pool = ProcessPoolExecutor(
+            max_workers=len(self.shards),
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=sharded_index.init_worker,
+            initargs=(specs,),
+        )
+        self._pool_pid = os.getpid()
+        # with fork every worker is launched on the first submit, so do it now
+        self._pool.submit(sharded_index.ready).result()
+        atexit.register(self._pool.shutdown)
 
 engine = LocalLegalEngine()
 
@@ -0,0 +1,159 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+# how long a provider is skipped after it fails
+COOLDOWN_SECONDS = float(os.environ.get("AI_PROVIDER_COOLDOWN", "30"))
+# hedge delay used until a provider has enough samples for a real p95
+DEFAULT_HEDGE_AFTER = float(os.environ.get("AI_HEDGE_AFTER", "8"))
+# set AI_HEDGE=0 to only fail over on errors, never race providers
+HEDGING_ENABLED = os.environ.get("AI_HEDGE", "1") != "0"
+
+MIN_SAMPLES_FOR_P95 = 20
+WINDOW = 200
+
+
+class ProviderError(Exception):
+    """Raised by a backend when it could not produce an answer."""
+
+
+class Provider:
+    """A registered backend plus its rolling latency and health record."""
+
+    def __init__(self, name: str, fn: Callable[[str, str], dict], fallback_only: bool = False):
+        self.name = name
+        self.fn = fn
+        # fallback-only providers (the offline engine) always go last and are
+        # only raced once the provider ahead is past max(p95, AI_HEDGE_AFTER)
+        self.fallback_only = fallback_only
+        self._latencies = deque(maxlen=WINDOW)
+        self._unhealthy_until = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+            self._unhealthy_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self._unhealthy_until = time.monotonic() + COOLDOWN_SECONDS
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self._unhealthy_until
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def hedge_after(self) -> float:
+        """Seconds to wait on this provider before firing a hedge."""
+        if len(self._latencies) < MIN_SAMPLES_FOR_P95:
+            return DEFAULT_HEDGE_AFTER
+        return self.percentile(0.95)
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "samples": len(self._latencies),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+
+class ProviderRegistry:
+    """Ordered set of backends with failover, hedging and latency steering."""
+
+    def __init__(self):
+        self._providers: Dict[str, Provider] = {}
+
+    def register(self, name: str, fn: Callable[[str, str], dict], fallback_only: bool = False):
+        self._providers[name] = Provider(name, fn, fallback_only)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._providers
+
+    def stats(self) -> dict:
+        return {name: p.stats() for name, p in self._providers.items()}
+
+    def plan(self, order: List[str]) -> List[Provider]:
+        """Order providers for one request.
+
+        Healthy providers come first, fastest median first; providers with no
+        samples yet sort ahead so they get measured, and ties keep the
+        configured order. Providers in cooldown stay at the end as a last resort.
+        """
+        chosen = [self._providers[n] for n in order if n in self._providers]
+
+        def key(item):
+            position, p = item
+            p50 = p.percentile(0.5)
+            return (p.fallback_only, not p.healthy, p50 if p50 is not None else 0.0, position)
+
+        return [p for _, p in sorted(enumerate(chosen), key=key)]
+
+    def _run(self, provider: Provider, context: str, question: str, results: queue.Queue):
+        start = time.monotonic()
+        try:
+            result = provider.fn(context, question)
+        except Exception as e:
+            provider.record_failure()
+            results.put((provider, None, e))
+            return
+        provider.record_success(time.monotonic() - start)
+        results.put((provider, result, None))
+
+    def call(self, order: List[str], context: str, question: str) -> Optional[dict]:
+        """Return the first successful answer, or None if every provider failed.
+
+        A provider that errors is replaced by the next one straight away; one
+        that is merely slower than its p95 gets a second provider raced
+        against it, and whichever answers first wins. A fallback-only provider
+        is raced no earlier than AI_HEDGE_AFTER, so a slow remote call degrades
+        to it within a bounded time instead of waiting out its own timeout.
+
+        Every attempt gets its own thread, started immediately, so a hedge
+        never waits behind other requests' slow calls and the hedge timer
+        measures the provider itself. Losing attempts finish in the background.
+        """
+        plan = self.plan(order)
+        results = queue.Queue()
+        in_flight = 0
+
+        def launch():
+            provider = plan.pop(0)
+            threading.Thread(
+                target=self._run, args=(provider, context, question, results), daemon=True
+            ).start()
+            return provider
+
+        while plan or in_flight:
+            if not in_flight:
+                newest = launch()
+                in_flight += 1
+            deadline = None
+            if HEDGING_ENABLED and plan:
+                deadline = newest.hedge_after()
+                if plan[0].fallback_only:
+                    deadline = max(deadline, DEFAULT_HEDGE_AFTER)
+            try:
+                _, result, error = results.get(timeout=deadline)
+            except queue.Empty:
+                newest = launch()
+                in_flight += 1
+                continue
+            in_flight -= 1
+            if error is None:
+                return result
+            # it failed; keep a replacement in flight alongside any hedge
+            if in_flight and plan and not plan[0].fallback_only:
+                newest = launch()
+                in_flight += 1
+        return None
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# NOTE: keep this module free of engine imports. Pool workers are forked from
+# a parent that already holds the engine, and only resolve the functions below
+# when unpickling tasks; importing local_legal_engine here would rebuild the
+# whole index in any process that imports this module fresh.
+
+_ARRAYS = ("data", "indices", "indptr")
+
+# per-worker cache of memory-mapped shards, filled by init_worker
+_worker_shards = {}
+
+
+def plan_shards(act_sizes: List[int], n_shards: int) -> List[Tuple[int, int]]:
+    """Pack consecutive acts into ``n_shards`` balanced (offset, count) row ranges.
+
+    Each cut is moved to the nearest act boundary when that keeps the shard
+    within a quarter of the ideal size; otherwise the act is split by rows.
+    """
+    total = sum(act_sizes)
+    n_shards = max(1, min(n_shards, total))
+    boundaries = np.cumsum(act_sizes)
+    target = total / n_shards
+
+    cuts = [0]
+    for s in range(1, n_shards):
+        ideal = round(s * target)
+        nearest = int(boundaries[np.abs(boundaries - ideal).argmin()]) if len(boundaries) else ideal
+        cut = nearest if abs(nearest - ideal) <= target / 4 else ideal
+        if cuts[-1] < cut < total:
+            cuts.append(cut)
+    cuts.append(total)
+    return [(a, b - a) for a, b in zip(cuts, cuts[1:])]
+
+
+def save_shards(root: str, matrix: csr_matrix, shards: List[Tuple[int, int]]) -> List[str]:
+    """Write every shard's CSR arrays under a directory named by their content.
+
+    Published directories are never modified, so a process that has them
+    memory-mapped can't see a file truncated or rewritten underneath it. The
+    build happens in a private temp directory that is renamed into place;
+    if another process published the same index first, ours is discarded.
+
+    Older indexes are pruned except the newest previous one, which a process
+    started just before a corpus change may still be loading.
+    """
+    digest = hashlib.sha256()
+    for name in _ARRAYS:
+        digest.update(np.ascontiguousarray(getattr(matrix, name)).tobytes())
+    digest.update(repr((matrix.shape, shards)).encode())
+    final = os.path.join(root, digest.hexdigest()[:24])
+    paths = [os.path.join(final, f"shard_{i:04d}") for i in range(len(shards))]
+    if os.path.isdir(final):
+        _prune(root, keep=final)
+        return paths
+
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".build-", dir=root)
+    try:
+        for i, (offset, count) in enumerate(shards):
+            shard = matrix[offset:offset + count]
+            path = os.path.join(tmp, f"shard_{i:04d}")
+            os.makedirs(path)
+            for name in _ARRAYS:
+                np.save(os.path.join(path, f"{name}.npy"), getattr(shard, name))
+            np.save(os.path.join(path, "shape.npy"), np.array(shard.shape))
+        os.rename(tmp, final)
+    except OSError:
+        # lost the race to another process building the identical index
+        if not os.path.isdir(final):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    _prune(root, keep=final)
+    return paths
+
+
+def _prune(root: str, keep: str):
+    """Delete published indexes other than ``keep`` and the newest one before it.
+
+    Workers that already mapped a deleted shard keep reading it: unlinking a
+    file doesn't invalidate an existing mmap on POSIX.
+    """
+    others = [
+        os.path.join(root, name) for name in os.listdir(root)
+        if not name.startswith(".") and os.path.join(root, name) != keep
+    ]
+    others.sort(key=os.path.getmtime, reverse=True)
+    for path in others[1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_shard(path: str) -> csr_matrix:
+    """Open a shard written by save_shards without reading it into memory."""
+    data, indices, indptr = (
+        np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS
+    )
+    shape = tuple(np.load(os.path.join(path, "shape.npy")))
+    return csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+def top_k(matrix: csr_matrix, query_vec: csr_matrix, offset: int, k: int) -> List[Tuple[float, int]]:
+    """Score a shard against a query; return its best k as (score, global row).
+
+    TF-IDF rows are L2-normalised, so the dot product is the cosine similarity.
+    """
+    scores = (matrix @ query_vec.T).toarray().ravel()
+    if scores.size > k:
+        idx = np.argpartition(scores, -k)[-k:]
+    else:
+        idx = np.arange(scores.size)
+    return [(float(scores[i]), offset + int(i)) for i in idx]
+
+
+def init_worker(shard_specs):
+    """Pool initializer: mmap every shard once per worker process."""
+    for shard_id, (path, offset) in enumerate(shard_specs):
+        _worker_shards[shard_id] = (load_shard(path), offset)
+
+
+def ready() -> bool:
+    """No-op task used to make the pool start its workers."""
+    return True
+
+
+def score_in_worker(shard_id: int, query_vec: csr_matrix, k: int):
+    matrix, offset = _worker_shards[shard_id]
+    return top_k(matrix, query_vec, offset, k)
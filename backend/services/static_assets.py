@@ -0,0 +1,107 @@
+import hashlib
+import json
+import mimetypes
+import os
+from typing import Optional
+
+from flask import abort, request, send_file
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "static"))
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+SOURCE_HTML = "wakili_wetu.html"
+
+# hashed asset names change whenever their content does, so they never need revalidating
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_manifest = None
+_manifest_mtime = None
+_source_etag = None
+_source_mtime = None
+
+
+def _load_manifest() -> Optional[dict]:
+    """Return the build manifest, reloading it if build_static.py ran again."""
+    global _manifest, _manifest_mtime
+    path = os.path.join(DIST_DIR, "manifest.json")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        _manifest = _manifest_mtime = None
+        return None
+    if mtime != _manifest_mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            _manifest = json.load(f)
+        _manifest_mtime = mtime
+    return _manifest
+
+
+def _pick_encoding(available) -> Optional[str]:
+    """Choose the best precompressed variant the client accepts."""
+    accepted = request.accept_encodings
+    for enc in ("br", "gzip"):
+        if enc in available and accepted[enc] > 0:
+            return enc
+    return None
+
+
+def _send(path: str, name: str, etag: str, immutable: bool, encodings=()):
+    encoding = _pick_encoding(encodings)
+    mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if encoding:
+        path += _SUFFIXES[encoding]
+        # each encoded representation needs its own strong validator
+        etag = f"{etag}-{encoding}"
+
+    response = send_file(path, mimetype=mimetype, etag=False, conditional=False)
+    # send_file names the file on disk (e.g. index.html.gz); nothing here is a download
+    response.headers.pop("Content-Disposition", None)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    # turns the response into a 304 when If-None-Match matches
+    return response.make_conditional(request)
+
+
+def _send_source():
+    """Serve the unbuilt single-file frontend (no dist/ present)."""
+    global _source_etag, _source_mtime
+    path = os.path.join(STATIC_DIR, SOURCE_HTML)
+    mtime = os.path.getmtime(path)
+    if mtime != _source_mtime:
+        with open(path, "rb") as f:
+            _source_etag = hashlib.sha256(f.read()).hexdigest()[:16]
+        _source_mtime = mtime
+    return _send(path, SOURCE_HTML, _source_etag, immutable=False)
+
+
+def send_index():
+    """Serve the HTML shell; it must be revalidated so new asset hashes are picked up."""
+    manifest = _load_manifest()
+    if not manifest:
+        return _send_source()
+    name = manifest["index"]
+    info = manifest["files"][name]
+    return _send(os.path.join(DIST_DIR, name), name, info["hash"],
+                 immutable=False, encodings=info["encodings"])
+
+
+def send_asset(name: str):
+    """Serve a content-hashed asset listed in the current or previous build."""
+    manifest = _load_manifest()
+    info = None
+    if manifest:
+        info = manifest["files"].get(name) or manifest.get("previous", {}).get(name)
+    if info is None or name == manifest["index"]:
+        abort(404)
+    return _send(os.path.join(DIST_DIR, name), name, info["hash"],
+                 immutable=True, encodings=info["encodings"])
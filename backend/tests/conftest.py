@@ -0,0 +1,11 @@
+import os
+import sys
+
+# the app imports its packages relative to backend/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# the engine indexes LEGAL_DOCS_PATH at import time; point it at the shipped corpus
+os.environ.setdefault(
+    "LEGAL_DOCS_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "legal_docs")),
+)
@@ -0,0 +1,139 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.cross_references import (
+    CrossReferenceGraph, extract_references, heading_provision,
+)
+
+# filler so every body paragraph clears the engine's 120-character chunk minimum
+PAD = " The provision applies to every person in Kenya without exception or qualification."
+
+CONSTITUTION = f"""Article 27 – Equality
+
+Every person is equal before the law.{PAD}
+
+Article 40 – Property
+
+Subject to Article 65, every person has the right to acquire and own property.{PAD}
+
+Article 65 – Landholding by Non-citizens
+
+A non-citizen may hold land on the basis of leasehold tenure only.{PAD}
+"""
+
+EMPLOYMENT_ACT = f"""Section 41 – Hearing before Termination
+
+An employer shall hear any representations before dismissal.{PAD}
+
+Section 45 – Unfair Termination
+
+A termination is unfair where the employer fails to comply with section 41 of this Act.{PAD}
+"""
+
+LAND_ACT = f"""Section 24 – Interest in Land
+
+Registration vests absolute ownership, without prejudice to Article 40.{PAD}
+"""
+
+
+@pytest.mark.parametrize("text, expected", [
+    # bare articles belong to the citing file here; the graph may reroute them
+    ("Subject to Article 65, every person", [("land_act", "article", "65")]),
+    ("Article 41(2) applies", [("land_act", "article", "41")]),
+    ("Articles 27 and 28", [("land_act", "article", "27"), ("land_act", "article", "28")]),
+    ("Article 40 of the Constitution", [("constitution", "article", "40")]),
+    ("Article 3 of this Treaty", [("land_act", "article", "3")]),
+    ("Sections 3 to 5 of this Act",
+     [("land_act", "section", "3"), ("land_act", "section", "4"), ("land_act", "section", "5")]),
+    # implausibly wide ranges keep only their endpoints
+    ("Sections 1 to 5000000 of this Act", [("land_act", "section", "1"), ("land_act", "section", "5000000")]),
+    ("Section 4 of the Act", [("land_act", "section", "4")]),
+    ("section 5 of Part II", [("land_act", "section", "5")]),
+    ("section 41 of the Employment Act", [("employment_act", "section", "41")]),
+    ("Section 10 Of The Employment Act", [("employment_act", "section", "10")]),
+    ("section 7 of the Employment and Labour Relations Act",
+     [("employment_and_labour_relations_act", "section", "7")]),
+    ("Section 107 of the Land Act, 2012", [("land_act", "section", "107")]),
+    # names an instrument that can't be parsed: dropped rather than pinned on land_act
+    ("section 9 of the employment act", []),
+    ("section 4 of the Penal Code", []),
+    ("section 4 of Cap. 63", []),
+    ("rule 3 under section 6 of the Land Control Rules", []),
+    ("Article 5 of the EAC Treaty", []),
+])
+def test_extract_references(text, expected):
+    assert extract_references(text, "land_act") == expected
+
+
+def test_bare_articles_resolve_by_citing_file():
+    provisions = [
+        ("constitution", "article", "3"),
+        ("eac_treaty", "article", "3"),
+        ("eac_treaty", "article", "9"),
+        ("land_act", "section", "24"),
+    ]
+    references = [
+        [],
+        [],
+        extract_references("Subject to Article 3 of this Treaty", "eac_treaty"),
+        extract_references("Without prejudice to Article 3", "land_act"),
+    ]
+    graph = CrossReferenceGraph(provisions, references)
+
+    # the treaty has its own articles; the land act doesn't, so it means the Constitution
+    assert graph.related([2], limit=5) == [1]
+    assert graph.related([3], limit=5) == [0]
+
+
+def test_article_headings_belong_to_their_own_file():
+    assert heading_provision("Article 3 – Scope", "constitution") == ("constitution", "article", "3")
+    assert heading_provision("Article 3 – Scope", "eac_treaty") == ("eac_treaty", "article", "3")
+    assert heading_provision("Article 3 applies here", "constitution") is None
+
+
+def test_related_uses_first_chunk_and_respects_limit():
+    # one popular provision (row 0) cited by ten others, each two chunks long
+    provisions = [("constitution", "article", "27")]
+    references = [[]]
+    for n in range(10):
+        provisions += [("act", "section", str(n))] * 2
+        references += [[("constitution", "article", "27")], []]
+    graph = CrossReferenceGraph(provisions, references)
+
+    # the second chunk of a citing section still reaches Article 27
+    assert graph.related([2], limit=5) == [0]
+    # only the first chunk of each citing section, and no more than the limit
+    assert graph.related([0], limit=3) == [1, 3, 5]
+    assert len(graph.related([0], limit=100)) == 10
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    pytest.importorskip("sklearn")
+    from services import local_legal_engine
+
+    (tmp_path / "constitution.txt").write_text(CONSTITUTION, encoding="utf-8")
+    (tmp_path / "employment_act.txt").write_text(EMPLOYMENT_ACT, encoding="utf-8")
+    (tmp_path / "land_act.txt").write_text(LAND_ACT, encoding="utf-8")
+    monkeypatch.setattr(local_legal_engine, "LEGAL_DOCS_PATH", str(tmp_path))
+    return local_legal_engine.LocalLegalEngine()
+
+
+def test_search_expands_with_cited_and_citing_provisions(engine):
+    hits = engine.search("leasehold non-citizen", k=1)
+    assert [text[:14] for text, _ in hits] == ["A non-citizen "]
+
+    expanded = engine.search("leasehold non-citizen", k=1, expand=True)
+    # Article 40 cites Article 65
+    assert [text[:14] for text, _ in expanded] == ["A non-citizen ", "Subject to Art"]
+
+    expanded = engine.search("unfair termination comply", k=1, expand=True)
+    assert [text[:14] for text, _ in expanded] == ["A termination ", "An employer sh"]
+
+
+def test_expansion_is_capped_at_k(engine):
+    hits = engine.search("acquire and own property", k=1, expand=True)
+    # Article 40 cites Article 65 and is cited by Section 24; k=1 keeps one of them
+    assert len(hits) == 2
+    assert hits[1][1] == "constitution.txt"
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from services import provider_registry
+from services.provider_registry import ProviderError, ProviderRegistry
+
+
+@pytest.fixture
+def release():
+    """Lets blocked "slow" providers finish once the test is done."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture(autouse=True)
+def quick_hedge(monkeypatch):
+    monkeypatch.setattr(provider_registry, "DEFAULT_HEDGE_AFTER", 0.05)
+    monkeypatch.setattr(provider_registry, "HEDGING_ENABLED", True)
+
+
+def answer(text):
+    return lambda context, question: {"text": text, "cites": []}
+
+
+def failing(context, question):
+    raise ProviderError("down")
+
+
+def test_error_fails_over_to_next_provider():
+    registry = ProviderRegistry()
+    registry.register("bad", failing)
+    registry.register("good", answer("good"))
+
+    assert registry.call(["bad", "good"], "ctx", "q")["text"] == "good"
+    assert registry.stats()["bad"]["healthy"] is False
+
+
+def test_slow_provider_is_hedged(release):
+    registry = ProviderRegistry()
+    registry.register("slow", lambda c, q: release.wait(5) and {"text": "slow", "cites": []})
+    registry.register("fast", answer("fast"))
+
+    start = time.monotonic()
+    result = registry.call(["slow", "fast"], "ctx", "q")
+
+    assert result["text"] == "fast"
+    assert time.monotonic() - start < 1
+
+
+def test_hedges_are_not_starved_by_concurrent_requests(release):
+    registry = ProviderRegistry()
+    registry.register("slow", lambda c, q: release.wait(5) and {"text": "slow", "cites": []})
+    registry.register("fast", answer("fast"))
+    texts = []
+
+    def request():
+        texts.append(registry.call(["slow", "fast"], "ctx", "q")["text"])
+
+    threads = [threading.Thread(target=request) for _ in range(16)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert texts == ["fast"] * 16
+    assert time.monotonic() - start < 1
+
+
+def test_all_providers_failing_returns_none():
+    registry = ProviderRegistry()
+    registry.register("a", failing)
+    registry.register("b", failing)
+
+    assert registry.call(["a", "b"], "ctx", "q") is None
+
+
+def test_provider_in_cooldown_is_ordered_last():
+    registry = ProviderRegistry()
+    registry.register("local", answer("local"), fallback_only=True)
+    registry.register("a", answer("a"))
+    registry.register("b", answer("b"))
+
+    registry.call(["a"], "ctx", "q")
+    registry._providers["a"].record_failure()
+
+    assert [p.name for p in registry.plan(["local", "a", "b"])] == ["b", "a", "local"]
+
+
+def test_slow_primary_degrades_to_fallback_only_provider(release):
+    # the default chain: one remote provider backed by the offline engine
+    registry = ProviderRegistry()
+    registry.register("gemini", lambda c, q: release.wait(2) and failing(c, q))
+    registry.register("local", answer("local"), fallback_only=True)
+
+    start = time.monotonic()
+    result = registry.call(["gemini", "local"], "ctx", "q")
+
+    assert result["text"] == "local"
+    assert time.monotonic() - start < 1
+
+
+def test_fallback_only_provider_waits_for_hedge_after(monkeypatch, release):
+    monkeypatch.setattr(provider_registry, "DEFAULT_HEDGE_AFTER", 0.5)
+    registry = ProviderRegistry()
+    calls = []
+
+    def local(context, question):
+        calls.append("local")
+        return {"text": "local", "cites": []}
+
+    registry.register("remote", lambda c, q: release.wait(0.1) or {"text": "remote", "cites": []})
+    registry.register("local", local, fallback_only=True)
+    # a p95 well under AI_HEDGE_AFTER must not pull the fallback in early
+    for _ in range(provider_registry.MIN_SAMPLES_FOR_P95):
+        registry._providers["remote"].record_success(0.01)
+
+    assert registry.call(["remote", "local"], "ctx", "q")["text"] == "remote"
+    assert calls == []
@@ -0,0 +1,98 @@
+import mmap
+import os
+import signal
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+
+from services import local_legal_engine, sharded_index
+from services.sharded_index import load_shard, plan_shards, save_shards
+
+QUERIES = ["termination hearing", "property", "discrimination", "rectification fraud"]
+
+
+def is_mapped(array):
+    """True if ``array`` is a view onto a memory-mapped file."""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+@pytest.mark.parametrize("act_sizes, n_shards, expected", [
+    ([3, 3, 3], 3, [(0, 3), (3, 3), (6, 3)]),
+    # empty acts don't produce empty shards
+    ([0, 3, 0, 3, 0], 2, [(0, 3), (3, 3)]),
+    # never more shards than rows
+    ([1, 1], 8, [(0, 1), (1, 1)]),
+    # one huge act is split by rows
+    ([10], 4, [(0, 2), (2, 3), (5, 3), (8, 2)]),
+    # a cut far from any act boundary splits the act instead
+    ([100, 1, 1, 1, 50], 3, [(0, 51), (51, 51), (102, 51)]),
+    # a cut close to a boundary snaps to it
+    ([9, 11], 2, [(0, 9), (9, 11)]),
+])
+def test_plan_shards(act_sizes, n_shards, expected):
+    shards = plan_shards(act_sizes, n_shards)
+    assert shards == expected
+    assert sum(count for _, count in shards) == sum(act_sizes)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    matrix = sparse_random(20, 7, density=0.3, format="csr", random_state=0)
+    shards = plan_shards([8, 12], 2)
+
+    paths = save_shards(str(tmp_path), matrix, shards)
+
+    for path, (offset, count) in zip(paths, shards):
+        loaded = load_shard(path)
+        assert is_mapped(loaded.data)
+        assert (loaded != matrix[offset:offset + count]).nnz == 0
+    # saving the same index again reuses the published directory
+    assert save_shards(str(tmp_path), matrix, shards) == paths
+
+
+def test_old_indexes_are_pruned(tmp_path):
+    published = []
+    for seed in range(4):
+        matrix = sparse_random(10, 5, density=0.3, format="csr", random_state=seed)
+        published.append(os.path.dirname(save_shards(str(tmp_path), matrix, [(0, 10)])[0]))
+        time.sleep(0.01)
+
+    # the current index and the one before it
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in published[-2:])
+
+
+@pytest.fixture
+def pooled(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_legal_engine, "SEARCH_WORKERS", 2)
+    monkeypatch.setattr(local_legal_engine, "LEGAL_INDEX_PATH", str(tmp_path))
+    engine = local_legal_engine.LocalLegalEngine()
+    assert engine._get_pool() is not None
+    yield engine
+    if engine._pool:
+        engine._pool.shutdown()
+
+
+def test_pooled_search_matches_in_process(pooled):
+    serial = local_legal_engine.engine
+    assert serial._get_pool() is None
+    for q in QUERIES:
+        assert pooled.search(q) == serial.search(q)
+
+
+def test_dead_worker_falls_back_to_in_process(pooled):
+    serial = local_legal_engine.engine
+    os.kill(next(iter(pooled._pool._processes)), signal.SIGKILL)
+    time.sleep(0.2)
+
+    for q in QUERIES:
+        assert pooled.search(q) == serial.search(q)
+    assert pooled._get_pool() is None
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+
+from flask import Flask
+
+import build_static
+from services import static_assets
+
+PAGE = """<!DOCTYPE html>
+<html><head><style>body {{ color: {color}; }}</style></head>
+<body><div id="app"></div>
+<script>document.getElementById("app").textContent = "hi";</script>
+</body></html>
+"""
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    source = tmp_path / "wakili_wetu.html"
+    dist = tmp_path / "dist"
+    monkeypatch.setattr(build_static, "SOURCE_HTML", str(source))
+    monkeypatch.setattr(build_static, "DIST_DIR", str(dist))
+    monkeypatch.setattr(static_assets, "STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(static_assets, "DIST_DIR", str(dist))
+    monkeypatch.setattr(static_assets, "_manifest", None)
+    monkeypatch.setattr(static_assets, "_manifest_mtime", None)
+    monkeypatch.setattr(static_assets, "_source_mtime", None)
+
+    def build(color="red"):
+        source.write_text(PAGE.format(color=color), encoding="utf-8")
+        return build_static.build()
+
+    app = Flask(__name__)
+    app.add_url_rule("/", "index", static_assets.send_index)
+    app.add_url_rule("/assets/<path:name>", "assets", static_assets.send_asset)
+    return app.test_client(), build
+
+
+def css_name(manifest):
+    return next(n for n in manifest["files"] if n.endswith(".css"))
+
+
+def test_index_negotiates_gzip_with_its_own_etag(site):
+    client, build = site
+    manifest = build()
+
+    r = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert r.status_code == 200
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert r.headers["ETag"] == f'"{manifest["files"]["index.html"]["hash"]}-gzip"'
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert r.headers["Cache-Control"] == "no-cache"
+    assert "Content-Disposition" not in r.headers
+
+
+def test_identity_request_gets_uncompressed_body(site):
+    client, build = site
+    build()
+
+    r = client.get("/", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in r.headers
+    assert b"/assets/app." in r.data
+
+
+def test_if_none_match_returns_304(site):
+    client, build = site
+    name = css_name(build())
+
+    etag = client.get(f"/assets/{name}").headers["ETag"]
+    r = client.get(f"/assets/{name}", headers={"If-None-Match": etag})
+
+    assert r.status_code == 304
+    assert r.data == b""
+
+
+def test_hashed_assets_are_immutable(site):
+    client, build = site
+    name = css_name(build())
+
+    r = client.get(f"/assets/{name}")
+
+    assert r.status_code == 200
+    assert r.mimetype == "text/css"
+    assert "immutable" in r.headers["Cache-Control"]
+    assert "max-age=31536000" in r.headers["Cache-Control"]
+
+
+@pytest.mark.parametrize("name", ["index.html", "manifest.json", "app.missing.js"])
+def test_unlisted_assets_are_404(site, name):
+    client, build = site
+    build()
+
+    assert client.get(f"/assets/{name}").status_code == 404
+
+
+def test_previous_build_assets_survive_one_rebuild(site):
+    client, build = site
+    first = css_name(build("red"))
+    second = css_name(build("blue"))
+    assert first != second
+
+    assert client.get(f"/assets/{first}").status_code == 200
+    assert client.get(f"/assets/{second}").status_code == 200
+
+    # a third build prunes the first
+    build("green")
+    assert client.get(f"/assets/{first}").status_code == 404
+
+
+def test_without_dist_the_source_page_is_served(site, tmp_path):
+    client, _ = site
+    (tmp_path / "wakili_wetu.html").write_text(PAGE.format(color="red"), encoding="utf-8")
+
+    r = client.get("/")
+
+    assert r.status_code == 200
+    assert b"<style>" in r.data
+    assert r.headers["Cache-Control"] == "no-cache"
+    assert client.get("/", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+    assert client.get("/assets/index.html").status_code == 404